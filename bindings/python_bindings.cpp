@@ -1,9 +1,20 @@
 #include <pybind11/pybind11.h>
-#include <pybind11/stl.h>
+#include <pybind11/numpy.h>
 #include "audioguard/Preprocessor.h"
+#include "audioguard/DspKernels.h"
+#include <algorithm>
+#include <cfloat>
+#include <cstdlib>
+#include <new>
 
 namespace py = pybind11;
 
+// float32, C-contiguous. Matching numpy arrays are borrowed as-is; anything else is converted once.
+using float_array = py::array_t<float, py::array::c_style | py::array::forcecast>;
+
+// Cache line / AVX-512 register width
+constexpr size_t BUFFER_ALIGNMENT = 64;
+
 PYBIND11_MODULE(audioguard_core, m)
 {
 
@@ -13,7 +24,120 @@ PYBIND11_MODULE(audioguard_core, m)
         .def(py::init<>()) // constructor
 
         .def("compute_log_mel_spectrogram",
-             &AudioGuard::Preprocessor::compute_log_mel_spectrogram, // callable function
-             py::call_guard<py::gil_scoped_release>(),               // GIL release
-             "Computes Log Mel-Spectrogram from raw audio input.");
-}
\ No newline at end of file
+             [](AudioGuard::Preprocessor &self, const float_array &input_wav, py::object out)
+             {
+                 if (input_wav.ndim() != 1)
+                 {
+                     throw py::value_error("input_wav must be a 1-D array");
+                 }
+                 size_t num_samples = static_cast<size_t>(input_wav.shape(0));
+                 py::ssize_t rows = static_cast<py::ssize_t>(self.num_frames(num_samples));
+                 py::ssize_t cols = self.num_mels();
+
+                 // Output is a numpy array written in place: no per-element Python floats, no copy back
+                 py::array_t<float> features;
+                 if (out.is_none())
+                 {
+                     features = py::array_t<float>({rows, cols});
+                 }
+                 else
+                 {
+                     if (!py::array_t<float, py::array::c_style>::check_(out))
+                     {
+                         throw py::type_error("out must be a C-contiguous float32 array");
+                     }
+                     features = py::reinterpret_borrow<py::array_t<float>>(out);
+                     if (features.ndim() != 2 || features.shape(0) != rows || features.shape(1) != cols)
+                     {
+                         throw py::value_error("out has the wrong shape for this input");
+                     }
+                 }
+
+                 float *output = features.mutable_data(); // raises if 'out' is read-only
+                 {
+                     py::gil_scoped_release release; // GIL release
+                     self.compute_log_mel_spectrogram(input_wav.data(), num_samples, output);
+                 }
+                 return features;
+             },
+             py::arg("input_wav"),
+             py::arg("out") = py::none(),
+             "Computes Log Mel-Spectrogram from raw audio input as a (frames, mels) float32 array.\n"
+             "If 'out' is given, the features are written into it and it is returned.");
+
+    m.def("power_to_db",
+          [](const float_array &S, float amin, float top_db)
+          {
+              // Same preconditions librosa enforces; !(x >= bound) also rejects NaN
+              if (!(amin >= FLT_MIN))
+              {
+                  throw py::value_error("amin must be a positive, normal float32 (>= FLT_MIN)");
+              }
+              if (!(top_db >= 0.0f))
+              {
+                  throw py::value_error("top_db must be non-negative");
+              }
+              py::array_t<float> result(std::vector<py::ssize_t>(S.shape(), S.shape() + S.ndim()));
+              const float *input = S.data();
+              float *output = result.mutable_data();
+              size_t size = static_cast<size_t>(S.size());
+              {
+                  py::gil_scoped_release release; // GIL release
+                  AudioGuard::power_to_db(input, output, size, amin, top_db);
+              }
+              return result;
+          },
+          py::arg("S"),
+          py::arg("amin") = 1e-10f,
+          py::arg("top_db") = 80.0f,
+          "Converts a power spectrogram to decibels relative to its maximum (librosa.power_to_db, ref=np.max).");
+
+    m.def("make_input_buffer",
+          [](size_t num_samples)
+          {
+              // aligned_alloc needs a size that is a multiple of the alignment
+              size_t bytes = (num_samples * sizeof(float) + BUFFER_ALIGNMENT - 1) / BUFFER_ALIGNMENT * BUFFER_ALIGNMENT;
+              void *memory = std::aligned_alloc(BUFFER_ALIGNMENT, std::max(bytes, BUFFER_ALIGNMENT));
+              if (memory == nullptr)
+              {
+                  throw std::bad_alloc();
+              }
+              float *data = static_cast<float *>(memory);
+              std::fill(data, data + num_samples, 0.0f);
+
+              // numpy owns the buffer through the capsule and frees it with the array
+              py::capsule owner(memory, [](void *p) { std::free(p); });
+              return py::array_t<float>({static_cast<py::ssize_t>(num_samples)}, data, owner);
+          },
+          py::arg("num_samples"),
+          "Returns a zeroed float32 array whose data is 64-byte aligned, for audio passed to the C++ core.\n"
+          "Fill it in place (e.g. buf[:] = audio) so the C++ side reads it without a copy.");
+
+    m.def("fft_512",
+          [](const float_array &frames)
+          {
+              using FFT512 = AudioGuard::RealFFT<512>;
+              static const FFT512 fft; // tables built once, on first use
+
+              if (frames.ndim() != 2 || frames.shape(1) != 512)
+              {
+                  throw py::value_error("frames must have shape (n_frames, 512)");
+              }
+              py::ssize_t num_frames = frames.shape(0);
+              py::ssize_t num_bins = static_cast<py::ssize_t>(FFT512::NUM_BINS);
+              py::array_t<float> spectrum({num_frames, num_bins, py::ssize_t(2)});
+
+              const float *input = frames.data();
+              float *output = spectrum.mutable_data();
+              {
+                  py::gil_scoped_release release; // GIL release
+                  for (py::ssize_t f = 0; f < num_frames; ++f)
+                  {
+                      fft.forward(input + f * 512, output + f * num_bins * 2);
+                  }
+              }
+              return spectrum;
+          },
+          py::arg("frames"),
+          "Real FFT of each (already windowed) 512-sample frame. Returns (n_frames, 257, 2) float32 (re, im).");
+}
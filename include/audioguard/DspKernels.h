@@ -0,0 +1,41 @@
+#pragma once
+
+#include <array>
+#include <cstddef>
+#include <cstdint>
+
+namespace AudioGuard
+{
+    // Power spectrogram -> decibels, relative to its loudest bin (librosa.power_to_db with ref=np.max):
+    //   out = max(10*log10(max(S, amin)) - 10*log10(max(max(S), amin)), -top_db)
+    // Requires amin >= FLT_MIN (positive and normal: the log10 only handles normal floats) and
+    // top_db >= 0; the Python binding raises ValueError otherwise.
+    // A NaN or +inf anywhere in 'input' makes the whole output NaN, as librosa.power_to_db does.
+    // 'input' and 'output' may point to the same buffer.
+    void power_to_db(const float *input, float *output, size_t size,
+                     float amin = 1e-10f, float top_db = 80.0f);
+
+    // Radix-2 decimation-in-time FFT of a real frame, specialised at compile time for N (a power of two).
+    // The bit-reversal permutation and per-stage twiddles are built once, in the constructor.
+    template <size_t N>
+    class RealFFT
+    {
+        static_assert(N >= 2 && (N & (N - 1)) == 0, "RealFFT size must be a power of two");
+
+    public:
+        static constexpr size_t NUM_BINS = N / 2 + 1;
+
+        RealFFT();
+
+        // Writes NUM_BINS interleaved (re, im) pairs, i.e. 2 * NUM_BINS floats, into 'spectrum'
+        void forward(const float *frame, float *spectrum) const;
+
+    private:
+        std::array<uint32_t, N> bit_reverse;
+        // Stage with half-size h uses twiddles [h - 1, 2h - 1): contiguous, so butterflies vectorise
+        std::array<float, N - 1> twiddle_re;
+        std::array<float, N - 1> twiddle_im;
+    };
+
+    extern template class RealFFT<512>;
+}
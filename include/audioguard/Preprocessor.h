@@ -3,6 +3,7 @@
 #include <vector>
 #include <complex>
 #include <cmath>
+#include "audioguard/DspKernels.h"
 
 namespace AudioGuard
 {
@@ -17,9 +18,15 @@ namespace AudioGuard
 
         std::vector<vector> compute_log_mel_spectrogram(const vector &input_wav);
 
+        // Writes [num_frames(num_samples) x num_mels()] features, row-major, into 'output'
+        void compute_log_mel_spectrogram(const float *input_wav, size_t num_samples, float *output);
+
+        size_t num_frames(size_t num_samples) const;
+        int num_mels() const { return N_MELS; }
+
     private:
         const int SAMPLE_RATE = 16000;
-        const int N_FFT = 512;
+        static constexpr int N_FFT = 512; // compile-time: the FFT below is specialised for it
         const int HOP_LENGTH = 160;
         const int N_MELS = 40;
         const float F_MIN = 0.0f;
@@ -27,6 +34,7 @@ namespace AudioGuard
 
         vector hann_window;
         std::vector<vector> mel_filterbank;
+        RealFFT<N_FFT> fft;
 
         void init_hann_window();
         void init_mel_filterbank();
@@ -1,7 +1,11 @@
-import librosa
+import io
 import numpy as np
 import os
-import tensorflow as tf
+import scipy.fft
+import soundfile as sf
+import threading
+from numba import njit, prange, types
+from numpy.lib.stride_tricks import sliding_window_view
 
 # --- DSP GOLDEN CONSTANTS (MUST BE PORTED TO C++) ---
 SAMPLE_RATE = 16000 # Fixed audio rate
@@ -10,52 +14,320 @@ N_FFT = 512      # FFT window size (determines frequency resolution)
 HOP_LENGTH = 160 # Hop size (10ms step at 16kHz) - determines time resolution
 N_MELS = 40      # Number of Mel frequency bands (the final feature depth)
 FMAX = 8000      # Maximum frequency to consider (usually half the sample rate)
+AMIN = 1e-10     # Power floor before the log (prevents log(0))
+TOP_DB = 80.0    # Dynamic range kept below the loudest bin (in dB)
+N_FRAMES = 1 + CLIP_LENGTH_SAMPLES // HOP_LENGTH # Frames per clip (centred STFT)
 
-def compute_log_mel_spectrogram(waveform: np.ndarray) -> np.ndarray:
+# --- PRECOMPUTED TABLES ---
+# The Hann window and Mel filterbank are deterministic from the constants above, so they are
+# baked into dsp_constants.npz (see export_dsp_constants.py) and only loaded at import.
+CONSTANTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dsp_constants.npz')
+_TABLE_PARAMS = np.array([SAMPLE_RATE, N_FFT, N_MELS, FMAX]) # What the baked tables depend on
+
+def _build_tables():
+    """
+    Derives the Hann window and Mel filterbank from the golden constants.
+    Periodic Hann window (librosa's STFT default; np.hanning is the symmetric variant and differs).
+    Mel filterbank is [N_MELS x (N_FFT/2 + 1)].
+    """
+    import librosa
+
+    hann = librosa.filters.get_window('hann', N_FFT, fftbins=True).astype(np.float32)
+    mel_fb = librosa.filters.mel(sr=SAMPLE_RATE, n_fft=N_FFT, n_mels=N_MELS, fmax=FMAX).astype(np.float32)
+    return hann, mel_fb
+
+def _load_tables():
+    """
+    Loads the baked tables, falling back to _build_tables() if the file is missing or was
+    exported for different constants.
+    """
+    try:
+        with np.load(CONSTANTS_PATH) as consts:
+            if np.array_equal(consts['params'], _TABLE_PARAMS):
+                return consts['hann'], consts['mel_fb']
+    except FileNotFoundError:
+        pass
+    return _build_tables()
+
+_HANN, _MEL_FB = _load_tables()
+
+# Each triangle only covers a contiguous run of FFT bins: [first, last + 1) per Mel band.
+# ~95% of the filterbank is zeros, so the projection only visits these ranges.
+_MEL_SUPPORT = _MEL_FB > 0
+_MEL_BANDS = np.stack([
+    _MEL_SUPPORT.argmax(axis=1),
+    _MEL_SUPPORT.shape[1] - _MEL_SUPPORT[:, ::-1].argmax(axis=1),
+], axis=1).astype(np.int64)
+del _MEL_SUPPORT
+_HANN.setflags(write=False)
+_MEL_FB.setflags(write=False)
+_MEL_BANDS.setflags(write=False)
+
+# --- SCRATCH BUFFERS ---
+# Reused across calls to avoid per-call allocation. One set per thread (see _get_scratch), so
+# concurrent calls never share them: the FFT and windowing release the GIL mid-call.
+_SCRATCH = threading.local()
+
+# Clips per pass in the CPU batch path: keeps each pass's frames and spectra (~7 MB) near cache
+# size instead of streaming the whole batch through memory at every stage
+_BATCH_CHUNK = 16
+
+# torchaudio MelSpectrogram modules for the batch path, keyed by device and built on first use
+_TORCH_MEL = {}
+
+# Explicit signature: compiled (or loaded from the on-disk cache) at import rather than on
+# the first call, and specialised for C-contiguous inputs. The lookup tables are read-only.
+_POWER_TO_MEL_SIG = types.void(
+    types.complex64[:, ::1],                           # spectrum  (n_frames, n_bins)
+    types.Array(types.float32, 2, 'C', readonly=True), # mel_fb    (n_mels, n_bins)
+    types.Array(types.int64, 2, 'C', readonly=True),   # mel_bands (n_mels, 2)
+    types.float32[:, ::1],                             # out       (n_frames, n_mels)
+)
+
+# Frames per tile in the Mel projection: the innermost loop runs across a tile of frames
+# with unit stride, so it vectorises like a GEMM micro-kernel (compile-time constant for Numba).
+_FRAME_BLOCK = 16
+
+@njit(_POWER_TO_MEL_SIG, cache=True, fastmath=True)
+def _power_to_mel(spectrum, mel_fb, mel_bands, out):
+    """
+    Fused power spectrum + Mel projection: out[f, m] = sum_k mel_fb[m, k] * |spectrum[f, k]|^2.
+    Frames are processed _FRAME_BLOCK at a time: the tile's power is stored bin-major in a small
+    scratch buffer (the full power spectrogram is never materialised), then each Mel band sums
+    over its non-zero bins mel_bands[m, 0]:mel_bands[m, 1] for every frame in the tile at once.
+    """
+    n_frames, n_bins = spectrum.shape
+    n_mels = mel_fb.shape[0]
+    power = np.zeros((n_bins, _FRAME_BLOCK), dtype=np.float32)
+    acc = np.empty(_FRAME_BLOCK, dtype=np.float32)
+    for f0 in range(0, n_frames, _FRAME_BLOCK):
+        width = min(_FRAME_BLOCK, n_frames - f0)
+        for j in range(width):
+            for k in range(n_bins):
+                x = spectrum[f0 + j, k]
+                power[k, j] = x.real * x.real + x.imag * x.imag
+        for m in range(n_mels):
+            acc[:] = 0.0
+            for k in range(mel_bands[m, 0], mel_bands[m, 1]):
+                w = mel_fb[m, k]
+                for j in range(_FRAME_BLOCK):
+                    acc[j] += w * power[k, j]
+            for j in range(width):
+                out[f0 + j, m] = acc[j]
+
+_POWER_TO_MEL_BATCH_SIG = types.void(
+    types.complex64[:, :, ::1],                        # spectra   (n_clips, n_frames, n_bins)
+    types.Array(types.float32, 2, 'C', readonly=True), # mel_fb    (n_mels, n_bins)
+    types.Array(types.int64, 2, 'C', readonly=True),   # mel_bands (n_mels, 2)
+    types.float32[:, :, ::1],                          # out       (n_clips, n_frames, n_mels)
+)
+
+@njit(_POWER_TO_MEL_BATCH_SIG, cache=True, parallel=True, nogil=True)
+def _power_to_mel_batch(spectra, mel_fb, mel_bands, out):
+    """
+    _power_to_mel over a batch of clips, one clip per thread (clips are independent).
+    """
+    for i in prange(spectra.shape[0]):
+        _power_to_mel(spectra[i], mel_fb, mel_bands, out[i])
+
+def _power_to_db(mel_spectrogram: np.ndarray) -> np.ndarray:
+    """
+    In-place equivalent of librosa.power_to_db(S, ref=np.max, amin=AMIN, top_db=TOP_DB).
+    The reference is taken over the last two axes, so a (N, frames, mels) batch is referenced
+    per clip. After subtracting the reference the loudest bin sits at 0 dB, so the top_db
+    clip is a constant floor and needs no second max-reduction. That shortcut assumes a finite
+    reference, so a clip whose maximum is +inf (or NaN) is made all-NaN, as librosa's is.
+    """
+    ref = mel_spectrogram.max(axis=(-2, -1), keepdims=True)
+    ref_db = 10.0 * np.log10(np.maximum(ref, AMIN))
+    ref_db[~np.isfinite(ref_db)] = np.nan
+    np.maximum(mel_spectrogram, AMIN, out=mel_spectrogram)
+    np.log10(mel_spectrogram, out=mel_spectrogram)
+    mel_spectrogram *= 10.0
+    mel_spectrogram -= ref_db
+    np.maximum(mel_spectrogram, -TOP_DB, out=mel_spectrogram)
+    return mel_spectrogram
+
+def load_audio(source) -> np.ndarray:
+    """
+    Reads one clip from a file path or file-like object as mono float32 at SAMPLE_RATE.
+    Goes straight through libsndfile (no audioread fallback) and only resamples when
+    the file is not already at SAMPLE_RATE.
+    """
+    with sf.SoundFile(source) as audio_file:
+        sr = audio_file.samplerate
+        # Only decode one clip's worth of audio at the file's native rate
+        clip_frames = -(-CLIP_LENGTH_SAMPLES * sr // SAMPLE_RATE)
+        data = audio_file.read(frames=clip_frames, dtype='float32', always_2d=True)
+
+    # Downmix to mono
+    waveform = data.mean(axis=1) if data.shape[1] > 1 else data[:, 0]
+
+    if sr != SAMPLE_RATE:
+        # scipy.signal is slow to import and only needed here, so clips already at 16 kHz skip it
+        from scipy.signal import resample_poly
+        waveform = resample_poly(waveform, SAMPLE_RATE, sr).astype(np.float32)
+
+    return np.ascontiguousarray(waveform)
+
+def _get_scratch():
+    """
+    Returns this thread's (clip, frame_view, frames) scratch buffers, building them on its first call.
+    The clip sits in the middle of a padded buffer with N_FFT // 2 samples of centring padding on
+    each side. Those edges are never written, so they stay zero; only the clip region changes per call.
+    """
+    try:
+        return _SCRATCH.buffers
+    except AttributeError:
+        padded = np.zeros(CLIP_LENGTH_SAMPLES + N_FFT, dtype=np.float32)
+        clip = padded[N_FFT // 2 : N_FFT // 2 + CLIP_LENGTH_SAMPLES]
+        frame_view = sliding_window_view(padded, N_FFT)[::HOP_LENGTH] # (N_FRAMES, N_FFT), zero-copy
+        frames = np.empty((N_FRAMES, N_FFT), dtype=np.float32) # Windowed frames fed to the FFT
+        _SCRATCH.buffers = (clip, frame_view, frames)
+        return _SCRATCH.buffers
+
+def compute_log_mel_spectrogram(waveform: np.ndarray, out: np.ndarray | None = None) -> np.ndarray:
     """
     Computes the Log Mel-Spectrogram features from a raw audio waveform.
     This function defines the exact mathematical steps (the Gold Standard).
+    Pass a preallocated (N_FRAMES, N_MELS) float32 array as `out` to reuse it across calls.
+    Safe to call from several threads at once (scratch buffers are per thread), as long as
+    they do not share an `out` array.
     """
+    clip, frame_view, frames = _get_scratch()
+
     # 1. Input Validation / Pad / Trim
-    # Ensure the waveform is exactly 1 second (16000 samples)
-    if len(waveform) > CLIP_LENGTH_SAMPLES:
-        waveform = waveform[:CLIP_LENGTH_SAMPLES]
-    elif len(waveform) < CLIP_LENGTH_SAMPLES:
-        # Pad with zeros if necessary
-        padding = CLIP_LENGTH_SAMPLES - len(waveform)
-        waveform = np.pad(waveform, (0, padding), 'constant')
-
-    # 2. Compute the Mel Spectrogram
-    # This single line chains Framing, Windowing (Hann), FFT, and Mel-Filterbank.
-    mel_spectrogram = librosa.feature.melspectrogram(
-        y=waveform,
-        sr=SAMPLE_RATE,
-        n_fft=N_FFT,
-        hop_length=HOP_LENGTH,
-        n_mels=N_MELS,
-        fmax=FMAX,
-        power=2.0  # Use power spec (amplitude squared)
-    )
-
-    # 3. Convert to Log Scale (Decibels)
-    # This compresses the dynamic range of the features.
-    log_mel_spectrogram = librosa.power_to_db(mel_spectrogram, ref=np.max)
-
-    # 4. Transpose (Feature Map Shape)
-    # Librosa outputs (n_mels, n_frames). CNNs usually expect (n_frames, n_mels).
-    features = log_mel_spectrogram.T
-    
+    # Ensure the waveform is exactly 1 second (16000 samples): copy (and cast to float32)
+    # up to 16000 samples into the reused buffer and zero whatever the clip does not cover.
+    n = min(len(waveform), CLIP_LENGTH_SAMPLES)
+    clip[:n] = waveform[:n]
+    clip[n:] = 0.0
+
+    # 2. Short-Time Fourier Transform
+    # The buffer is already centred (zero padding, as librosa does), so every frame is a row
+    # of the precomputed strided view. Frames are windowed as they are copied, in a single
+    # pass, into the frame buffer, then one batched FFT runs over all of them.
+    # scipy.fft (pocketfft) stays in float32 and spreads the frames over all cores.
+    np.multiply(frame_view, _HANN, out=frames)
+    stft = scipy.fft.rfft(frames, n=N_FFT, axis=1, workers=-1)
+
+    # 3. Power Spectrum + Mel Filterbank (fused, JIT-compiled)
+    # Written straight into the (n_frames, n_mels) layout CNNs expect, so no transpose is needed.
+    if out is None:
+        mel_spectrogram = np.empty((N_FRAMES, N_MELS), dtype=np.float32)
+    elif out.shape != (N_FRAMES, N_MELS) or out.dtype != np.float32 or not out.flags.c_contiguous:
+        raise ValueError(f"out must be a C-contiguous float32 array of shape {(N_FRAMES, N_MELS)}")
+    else:
+        mel_spectrogram = out
+    _power_to_mel(stft, _MEL_FB, _MEL_BANDS, mel_spectrogram)
+
+    # 4. Convert to Log Scale (Decibels, relative to the loudest bin)
+    # This compresses the dynamic range of the features. Done in place on the mel buffer.
+    features = _power_to_db(mel_spectrogram)
+
     return features
 
+def _get_torch_mel(device):
+    """
+    Lazily builds (and caches) a torchaudio MelSpectrogram matching the Gold Standard on `device`.
+    torch/torchaudio are only imported here, so the single-clip path never pays for them.
+    """
+    if device not in _TORCH_MEL:
+        import torchaudio
+
+        _TORCH_MEL[device] = torchaudio.transforms.MelSpectrogram(
+            sample_rate=SAMPLE_RATE,
+            n_fft=N_FFT,
+            hop_length=HOP_LENGTH,
+            n_mels=N_MELS,
+            f_max=FMAX,
+            power=2.0,
+            center=True,
+            pad_mode='constant', # Same zero padding as the STFT above
+            norm='slaney',       # Same filterbank as librosa.filters.mel
+            mel_scale='slaney'
+        ).to(device)
+    return _TORCH_MEL[device]
+
+def compute_log_mel_spectrogram_batch(waveforms: np.ndarray, device: str | None = None) -> np.ndarray:
+    """
+    Computes Log Mel-Spectrograms for a batch of clips.
+    Takes (N, samples) audio and returns (N, N_FRAMES, N_MELS) float32 features, each clip
+    trimmed/padded and referenced to its own loudest bin exactly like compute_log_mel_spectrogram.
+    By default runs on the CPU across all cores; pass a torch device (e.g. 'cuda') to use torchaudio.
+    """
+    # 1. Pad / Trim every clip to exactly 1 second
+    waveforms = np.asarray(waveforms, dtype=np.float32)
+    if waveforms.ndim != 2:
+        raise ValueError(f"waveforms must have shape (N, samples), got {waveforms.shape}")
+    if waveforms.shape[1] > CLIP_LENGTH_SAMPLES:
+        waveforms = waveforms[:, :CLIP_LENGTH_SAMPLES]
+    elif waveforms.shape[1] < CLIP_LENGTH_SAMPLES:
+        waveforms = np.pad(waveforms, ((0, 0), (0, CLIP_LENGTH_SAMPLES - waveforms.shape[1])), 'constant')
+
+    if device is not None:
+        return _compute_log_mel_spectrogram_torch(waveforms, device)
+
+    # 2. Centre every clip (same zero padding as the single-clip path)
+    # The batch path uses per-call buffers and shares no module state.
+    num_clips = waveforms.shape[0]
+    padded = np.zeros((num_clips, CLIP_LENGTH_SAMPLES + N_FFT), dtype=np.float32)
+    padded[:, N_FFT // 2 : N_FFT // 2 + CLIP_LENGTH_SAMPLES] = waveforms
+    frames = sliding_window_view(padded, N_FFT, axis=1)[:, ::HOP_LENGTH] # (N, N_FRAMES, N_FFT), zero-copy
+
+    # 3. STFT + Power Spectrum + Mel Filterbank, _BATCH_CHUNK clips per pass
+    # Each pass windows its frames into one reused buffer, runs a batched FFT across all cores
+    # and projects the clips onto the Mel bands one clip per thread (Numba prange, GIL released).
+    mel_spectrogram = np.empty((num_clips, N_FRAMES, N_MELS), dtype=np.float32)
+    windowed = np.empty((min(num_clips, _BATCH_CHUNK), N_FRAMES, N_FFT), dtype=np.float32)
+    for start in range(0, num_clips, _BATCH_CHUNK):
+        stop = min(start + _BATCH_CHUNK, num_clips)
+        chunk = windowed[:stop - start]
+        np.multiply(frames[start:stop], _HANN, out=chunk)
+        stft = scipy.fft.rfft(chunk, n=N_FFT, axis=-1, workers=-1)
+        _power_to_mel_batch(stft, _MEL_FB, _MEL_BANDS, mel_spectrogram[start:stop])
+
+    # 4. Log Scale, referenced per clip
+    return _power_to_db(mel_spectrogram)
+
+def _compute_log_mel_spectrogram_torch(waveforms: np.ndarray, device: str) -> np.ndarray:
+    """
+    torchaudio implementation of compute_log_mel_spectrogram_batch for already padded/trimmed
+    (N, CLIP_LENGTH_SAMPLES) float32 clips.
+    """
+    import torch
+
+    with torch.inference_mode():
+        # 1. One host->device copy for the whole batch
+        batch = torch.from_numpy(np.ascontiguousarray(waveforms))
+        if torch.device(device).type == 'cuda':
+            batch = batch.pin_memory()
+        batch = batch.to(device, non_blocking=True)
+
+        # 2. STFT + Power + Mel Filterbank for all clips at once: (N, n_mels, n_frames)
+        mel_spectrogram = _get_torch_mel(device)(batch)
+
+        # 3. Log Scale, per clip: 10*log10(S) - 10*log10(max(S)), clipped at -TOP_DB
+        ref_db = mel_spectrogram.amax(dim=(1, 2), keepdim=True).clamp_(min=AMIN).log10_().mul_(10.0)
+        log_mel = mel_spectrogram.clamp_(min=AMIN).log10_().mul_(10.0).sub_(ref_db).clamp_(min=-TOP_DB)
+
+        # 4. (N, n_frames, n_mels) like the single-clip path, transposed on the device
+        return log_mel.transpose(1, 2).contiguous().cpu().numpy()
+
 # --- Example Usage ---
 if __name__ == '__main__':
     print("--- Running DSP Golden Reference Test ---")
     
-    # Generate dummy data directly (No file I/O needed here anymore)
+    # Generate dummy data and round-trip it through an in-memory WAV, so the
+    # file-input path (load_audio) is exercised without touching the disk
     dummy_waveform = np.random.randn(CLIP_LENGTH_SAMPLES).astype(np.float32)
+    wav_buffer = io.BytesIO()
+    sf.write(wav_buffer, dummy_waveform, SAMPLE_RATE, format='WAV', subtype='FLOAT')
+    wav_buffer.seek(0)
+    waveform = load_audio(wav_buffer)
     
     # Run the function
-    features = compute_log_mel_spectrogram(dummy_waveform)
+    features = compute_log_mel_spectrogram(waveform)
     
     print(f"Input Sample Rate: {SAMPLE_RATE} Hz")
     print(f"Frame Size (N_FFT): {N_FFT} samples")
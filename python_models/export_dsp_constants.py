@@ -0,0 +1,12 @@
+"""
+Bakes the Hann window and Mel filterbank used by dsp.py into dsp_constants.npz, so importing
+dsp.py neither recomputes them nor imports librosa. Re-run after changing any golden constant.
+"""
+import numpy as np
+
+import dsp
+
+if __name__ == '__main__':
+    hann, mel_fb = dsp._build_tables()
+    np.savez(dsp.CONSTANTS_PATH, hann=hann, mel_fb=mel_fb, params=dsp._TABLE_PARAMS)
+    print(f"Wrote {dsp.CONSTANTS_PATH}: hann {hann.shape}, mel_fb {mel_fb.shape}")
@@ -1,6 +1,7 @@
 import numpy as np
 import sys
 import os
+from numba import njit
 
 # Add the build directory to the Python path so we can import the C++ module
 # (Adjust 'build' if your build folder is named differently)
@@ -16,16 +17,90 @@ except ImportError as e:
 
 import gold_standard_dsp
 
+@njit(cache=True)
+def max_abs_diff(a, b):
+    """
+    Largest |a - b| over two same-shaped arrays, in one pass with no temporary difference array.
+    A NaN anywhere is returned immediately, so it can never pass a tolerance check.
+    """
+    flat_a = a.ravel()
+    flat_b = b.ravel()
+    worst = 0.0
+    for i in range(flat_a.size):
+        d = abs(flat_a[i] - flat_b[i])
+        if d > worst:
+            worst = d
+        elif d != d:
+            return d
+    return worst
+
+@njit(cache=True, fastmath=True)
+def mean_squared_error(a, b):
+    """
+    Mean of (a - b)^2 in one pass, accumulated in float64, with no temporary arrays.
+    Only used once max_abs_diff has passed, so inputs are NaN-free and fastmath is safe.
+    """
+    flat_a = a.ravel()
+    flat_b = b.ravel()
+    total = 0.0
+    for i in range(flat_a.size):
+        d = np.float64(flat_a[i]) - np.float64(flat_b[i])
+        total += d * d
+    return total / flat_a.size
+
+def check_power_to_db():
+    """
+    audioguard_core.power_to_db against librosa.power_to_db(ref=np.max), including NaN and +inf
+    inputs: a non-finite reference must make the output NaN wherever it sits, never silently
+    drop out and shift the 0 dB point. Returns True if every case matches.
+    librosa is only imported here, so the interop comparison does not pay for it.
+    """
+    import librosa
+
+    print("\n--- 🧪 power_to_db Parity 🧪 ---\n")
+    rng = np.random.default_rng(0)
+    spectrum = rng.random((101, 40), dtype=np.float32) ** 4
+    cases = {"random spectrum": spectrum}
+    for position in (0, 1, 37, spectrum.size - 1):
+        with_nan = spectrum.copy()
+        with_nan.flat[position] = np.nan
+        cases[f"NaN at index {position}"] = with_nan
+    with_inf = spectrum.copy()
+    with_inf.flat[37] = np.inf
+    cases["+inf at index 37"] = with_inf
+
+    all_match = True
+    for name, S in cases.items():
+        expected = librosa.power_to_db(S, ref=np.max, amin=1e-10, top_db=80.0)
+        actual = audioguard_core.power_to_db(S)
+        if np.isnan(expected).any() or np.isnan(actual).any():
+            match = np.array_equal(np.isnan(expected), np.isnan(actual)) and \
+                max_abs_diff(np.nan_to_num(expected), np.nan_to_num(actual)) <= 1e-4
+        else:
+            match = max_abs_diff(expected, actual) <= 1e-4
+        print(f"{'✅' if match else '❌'} {name}")
+        all_match = all_match and match
+    return all_match
+
 def compare_outputs():
     print("\n--- 🧪 AudioGuard Interop Verification 🧪 ---\n")
 
     # 1. Generate Dummy Input (1 Second of Audio)
     # Must be float32 because our C++ vector expects floats!
     sample_rate = 16000
-    # Create a simple sine wave so we can inspect values easily if needed
-    t = np.linspace(0, 1, sample_rate, endpoint=False)
-    raw_audio = 0.5 * np.sin(2 * np.pi * 440 * t) # 440Hz tone
-    raw_audio = raw_audio.astype(np.float32)
+    # Create a simple sine wave so we can inspect values easily if needed.
+    # Built in place in a single float32 buffer (no float64 time axis).
+    # n * 440 is an exact integer in float32 (< 2^24), so wrapping it modulo the sample
+    # rate before scaling keeps the phase accurate to float32 rounding.
+    # The buffer comes from the C++ module so it is 64-byte aligned for its SIMD loads.
+    frequency = 440 # 440Hz tone
+    raw_audio = audioguard_core.make_input_buffer(sample_rate)
+    raw_audio[:] = np.arange(sample_rate, dtype=np.float32)
+    raw_audio *= frequency
+    np.fmod(raw_audio, sample_rate, out=raw_audio)
+    raw_audio *= 2 * np.pi / sample_rate
+    np.sin(raw_audio, out=raw_audio)
+    raw_audio *= 0.5
 
     # 2. Run Python Gold Standard
     print("1️⃣  Running Python Reference (Librosa)...")
@@ -37,11 +112,9 @@ def compare_outputs():
     # Initialize the C++ class
     preprocessor = audioguard_core.Preprocessor()
     
-    # Pass the numpy array directly (PyBind11 handles the conversion)
-    cpp_features_list = preprocessor.compute_log_mel_spectrogram(raw_audio)
-    
-    # Convert the result back to a numpy array for comparison
-    cpp_features = np.array(cpp_features_list, dtype=np.float32)
+    # Pass the numpy array directly: the float32 buffer is read in place and the
+    # features come back as a float32 numpy array (no Python list round-trip)
+    cpp_features = preprocessor.compute_log_mel_spectrogram(raw_audio)
     print(f"    C++ Output Shape:    {cpp_features.shape}")
 
     # 4. Verification Logic
@@ -50,28 +123,32 @@ def compare_outputs():
     # A. Shape Check
     if py_features.shape != cpp_features.shape:
         print(f"❌ SHAPE MISMATCH! Py: {py_features.shape} vs C++: {cpp_features.shape}")
-        return
+        return False
 
     # B. Value Check
-    # We allow a small tolerance (atol) because C++ sin/cos/log might strictly differ
+    # We allow a small absolute tolerance because C++ sin/cos/log might strictly differ
     # slightly from Python's numpy implementation due to floating point precision.
     tolerance = 1e-4 
-    is_close = np.allclose(py_features, cpp_features, atol=tolerance)
+    max_diff = max_abs_diff(py_features, cpp_features)
 
-    if is_close:
+    if max_diff <= tolerance:
         print(f"✅ SUCCESS! C++ and Python outputs match within {tolerance} tolerance.")
         
         # Calculate Mean Squared Error (MSE) just to be fancy
-        mse = np.mean((py_features - cpp_features) ** 2)
+        mse = mean_squared_error(py_features, cpp_features)
         print(f"    Mean Squared Error: {mse:.8f}")
+        return True
     else:
         print("❌ VALUE MISMATCH!")
-        diff = np.abs(py_features - cpp_features)
-        print(f"    Max Difference: {np.max(diff)}")
-        print(f"    Mean Difference: {np.mean(diff)}")
+        print(f"    Max Difference: {max_diff}")
+        print(f"    Mean Difference: {np.mean(np.abs(py_features - cpp_features))}")
         
         print("\n    First 5 Python values:\n", py_features[0][:5])
         print("    First 5 C++ values:   \n", cpp_features[0][:5])
+        return False
 
 if __name__ == "__main__":
-    compare_outputs()
\ No newline at end of file
+    # Run both checks (each prints its own report), then fail the process if either mismatched
+    power_to_db_ok = check_power_to_db()
+    interop_ok = compare_outputs()
+    sys.exit(0 if power_to_db_ok and interop_ok else 1)
\ No newline at end of file
@@ -0,0 +1,172 @@
+#include "audioguard/DspKernels.h"
+#include <algorithm>
+#include <cfloat>
+#include <cmath>
+#include <cstdint>
+#include <cstring>
+#include <limits>
+
+namespace AudioGuard
+{
+
+    // =============================================================
+    // 1. SIMD-FRIENDLY MATH
+    // Branch-free, libm-free code the compiler can vectorise (8-wide on AVX2, 4-wide on NEON).
+    // Needs -fno-trapping-math (set in CMakeLists.txt) so GCC can turn the selects into blends.
+    // =============================================================
+
+    // Independent accumulators for reductions, so no single loop-carried dependency chain
+    constexpr size_t LANES = 8;
+
+    // By-value max (std::max returns a reference, which keeps GCC from turning it into a select)
+    static inline float max_f(float a, float b) { return a > b ? a : b; }
+
+    // Same, but a NaN in 'a' sticks (a NaN in 'b' already wins through the select), like np.maximum.
+    // a != a is still a plain compare + blend, so reductions built on it vectorise the same way.
+    static inline float max_nan(float a, float b) { return (a > b || a != a) ? a : b; }
+
+    // log10 for positive, normal floats (callers clamp to amin first).
+    // Splits x into 2^e * m, folds m into [sqrt(0.5), sqrt(2)), then ln(m) = 2*atanh((m-1)/(m+1))
+    // as an odd series. Error is below 2e-5 dB over the whole float range.
+    static inline float log10_positive(float x)
+    {
+        uint32_t bits;
+        std::memcpy(&bits, &x, sizeof(bits));
+        int exponent = static_cast<int>((bits >> 23) & 0xffu) - 127;
+
+        uint32_t mantissa_bits = (bits & 0x007fffffu) | 0x3f800000u; // m in [1, 2)
+        float m;
+        std::memcpy(&m, &mantissa_bits, sizeof(m));
+        bool fold = m > 1.41421356f; // select, not a branch, so the loop stays vectorisable
+        m = fold ? 0.5f * m : m;
+        exponent += fold ? 1 : 0;
+
+        float t = (m - 1.0f) / (m + 1.0f);
+        float t2 = t * t;
+        float ln_m = 2.0f * t * (1.0f + t2 * (1.0f / 3.0f + t2 * (1.0f / 5.0f + t2 * (1.0f / 7.0f + t2 * (1.0f / 9.0f)))));
+
+        const float LN_2 = 0.693147181f;
+        const float LOG10_E = 0.434294482f;
+        return (static_cast<float>(exponent) * LN_2 + ln_m) * LOG10_E;
+    }
+
+    // =============================================================
+    // 2. KERNELS
+    // =============================================================
+
+    void power_to_db(const float *input, float *output, size_t size, float amin, float top_db)
+    {
+        // A. Reference: max reduction, one accumulator per lane.
+        // NaN-propagating, like np.max: otherwise a NaN would drop out at the next compare and the
+        // reference would depend on where it sat.
+        float lane_max[LANES];
+        std::fill(lane_max, lane_max + LANES, amin);
+        size_t i = 0;
+        for (; i + LANES <= size; i += LANES)
+        {
+            for (size_t l = 0; l < LANES; ++l)
+            {
+                lane_max[l] = max_nan(lane_max[l], input[i + l]);
+            }
+        }
+        float ref = amin;
+        for (size_t l = 0; l < LANES; ++l)
+        {
+            ref = max_nan(ref, lane_max[l]);
+        }
+        for (; i < size; ++i)
+        {
+            ref = max_nan(ref, input[i]);
+        }
+        // log10_positive reads the bits of NaN and +inf as finite numbers. A non-finite reference
+        // gives NaN instead, so the whole output is NaN, as librosa's is (its floor is max - top_db).
+        float ref_db = !(ref <= FLT_MAX) ? std::numeric_limits<float>::quiet_NaN()
+                                         : 10.0f * log10_positive(ref);
+
+        // B. Log scale against the reference, floored at -top_db (a NaN reference stays NaN, as in librosa)
+        for (size_t j = 0; j < size; ++j)
+        {
+            float db = 10.0f * log10_positive(max_f(input[j], amin)) - ref_db;
+            output[j] = max_nan(db, -top_db);
+        }
+    }
+
+    // =============================================================
+    // 3. FIXED-SIZE FFT
+    // =============================================================
+
+    template <size_t N>
+    RealFFT<N>::RealFFT()
+    {
+        size_t bits = 0;
+        while ((size_t(1) << bits) < N)
+        {
+            ++bits;
+        }
+        for (size_t i = 0; i < N; ++i)
+        {
+            uint32_t reversed = 0;
+            for (size_t b = 0; b < bits; ++b)
+            {
+                reversed |= ((i >> b) & 1u) << (bits - 1 - b);
+            }
+            bit_reverse[i] = reversed;
+        }
+
+        // Twiddles in double precision, rounded once: W_len^j = exp(-2*pi*i * j / len), len = 2h
+        for (size_t half = 1; half < N; half <<= 1)
+        {
+            for (size_t j = 0; j < half; ++j)
+            {
+                double angle = -M_PI * static_cast<double>(j) / static_cast<double>(half);
+                twiddle_re[half - 1 + j] = static_cast<float>(std::cos(angle));
+                twiddle_im[half - 1 + j] = static_cast<float>(std::sin(angle));
+            }
+        }
+    }
+
+    template <size_t N>
+    void RealFFT<N>::forward(const float *frame, float *spectrum) const
+    {
+        // Split real/imaginary arrays (SoA) keep every butterfly operand unit-stride
+        std::array<float, N> re;
+        std::array<float, N> im;
+        for (size_t i = 0; i < N; ++i)
+        {
+            re[i] = frame[bit_reverse[i]];
+            im[i] = 0.0f;
+        }
+
+        // log2(N) butterfly stages; N is a compile-time constant so every bound is known
+        for (size_t half = 1; half < N; half <<= 1)
+        {
+            const float *w_re = twiddle_re.data() + half - 1;
+            const float *w_im = twiddle_im.data() + half - 1;
+            for (size_t start = 0; start < N; start += 2 * half)
+            {
+                float *a_re = re.data() + start;
+                float *a_im = im.data() + start;
+                float *b_re = a_re + half;
+                float *b_im = a_im + half;
+                for (size_t j = 0; j < half; ++j)
+                {
+                    float t_re = w_re[j] * b_re[j] - w_im[j] * b_im[j];
+                    float t_im = w_re[j] * b_im[j] + w_im[j] * b_re[j];
+                    b_re[j] = a_re[j] - t_re;
+                    b_im[j] = a_im[j] - t_im;
+                    a_re[j] += t_re;
+                    a_im[j] += t_im;
+                }
+            }
+        }
+
+        // Real input: bins above N/2 are conjugate mirrors, so only NUM_BINS are kept
+        for (size_t k = 0; k < NUM_BINS; ++k)
+        {
+            spectrum[2 * k] = re[k];
+            spectrum[2 * k + 1] = im[k];
+        }
+    }
+
+    template class RealFFT<512>;
+}
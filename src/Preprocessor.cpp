@@ -32,15 +32,28 @@ namespace AudioGuard
     // =============================================================
     std::vector<vector> Preprocessor::compute_log_mel_spectrogram(const vector &input_wav)
     {
-        std::vector<vector> log_mel_spec;
-
-        // We slide our window across the audio (160 sample hop)
         size_t num_samples = input_wav.size();
+        size_t frames = num_frames(num_samples);
+
+        vector flat(frames * N_MELS);
+        compute_log_mel_spectrogram(input_wav.data(), num_samples, flat.data());
+
+        std::vector<vector> log_mel_spec(frames);
+        for (size_t f = 0; f < frames; ++f)
+        {
+            log_mel_spec[f].assign(flat.begin() + f * N_MELS, flat.begin() + (f + 1) * N_MELS);
+        }
 
+        return log_mel_spec;
+    }
+
+    void Preprocessor::compute_log_mel_spectrogram(const float *input_wav, size_t num_samples, float *output)
+    {
+        // We slide our window across the audio (160 sample hop)
         for (size_t i = 0; i + N_FFT <= num_samples; i += HOP_LENGTH)
         {
             // A. Extract Frame (Copy audio chunk)
-            vector frame(input_wav.begin() + i, input_wav.begin() + i + N_FFT);
+            vector frame(input_wav + i, input_wav + i + N_FFT);
 
             // B. Apply Window (Fast multiply using the 'hann_window' LUT)
             vector windowed = apply_window(frame);
@@ -51,13 +64,20 @@ namespace AudioGuard
             // D. Apply Mel Filterbank (Matrix Multiply using 'mel_filterbank' LUT)
             vector mel_spec = apply_mel_filter(power_spec);
 
-            // E. Log Scaling
+            // E. Log Scaling (written straight into this frame's output row)
             vector log_mel = apply_log_scale(mel_spec);
 
-            log_mel_spec.push_back(log_mel);
+            std::copy(log_mel.begin(), log_mel.end(), output + (i / HOP_LENGTH) * N_MELS);
         }
+    }
 
-        return log_mel_spec;
+    size_t Preprocessor::num_frames(size_t num_samples) const
+    {
+        if (num_samples < static_cast<size_t>(N_FFT))
+        {
+            return 0;
+        }
+        return 1 + (num_samples - N_FFT) / HOP_LENGTH;
     }
 
     // =============================================================
@@ -133,22 +153,16 @@ namespace AudioGuard
 
     vector Preprocessor::compute_power_spectrum(const vector &frame)
     {
-        // Simple DFT (O(N^2)) - We use this to avoid external dependencies for now.
-        // In Phase 4/Optimization, we will swap this for KissFFT.
+        // Radix-2 FFT specialised for N_FFT = 512 (9 butterfly stages) - see DspKernels.
         int num_bins = N_FFT / 2 + 1;
-        vector power_spec(num_bins);
+        vector spectrum(2 * num_bins); // interleaved (re, im)
+        fft.forward(frame.data(), spectrum.data());
 
+        vector power_spec(num_bins);
         for (int k = 0; k < num_bins; ++k)
         {
-            float real = 0.0f;
-            float imag = 0.0f;
-
-            for (int n = 0; n < N_FFT; ++n)
-            {
-                float angle = 2.0f * M_PI * k * n / N_FFT;
-                real += frame[n] * std::cos(angle);
-                imag -= frame[n] * std::sin(angle);
-            }
+            float real = spectrum[2 * k];
+            float imag = spectrum[2 * k + 1];
             power_spec[k] = (real * real + imag * imag) / N_FFT;
         }
         return power_spec;